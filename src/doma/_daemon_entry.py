@@ -0,0 +1,42 @@
+"""
+Entry point for the doma server process.
+
+Launched as ``python -m doma._daemon_entry`` so the server starts in a
+fresh, minimal interpreter instead of inheriting the CLI's full address
+space (click, pydantic, loguru) through fork.
+"""
+
+import os
+import signal
+
+
+def main():
+    from doma.configs import ControllerConfig
+    from doma.core import PID_PATH
+    from doma.gpu import GPUGroupManager
+    from doma.utils import get_logger
+
+    # Queued sink: log writes are batched on a background thread instead
+    # of paying a write syscall on the serving path.
+    get_logger(enqueue=True)
+
+    def signal_handler(signum, frame):
+        """Handle shutdown signals gracefully"""
+        logger = get_logger(enqueue=True)
+        logger.info(f"Received signal {signum}, shutting down...")
+        # The gpu_group_manager.listen_signal() loop will handle cleanup
+
+    # Set up signal handlers for graceful shutdown
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+
+    with open(PID_PATH, "w") as f:
+        f.write(str(os.getpid()))
+
+    gpu_group_manager = GPUGroupManager(ControllerConfig())
+    gpu_group_manager.listen_signal()
+    os.remove(PID_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,20 @@
 import os
 import signal
-from time import sleep
+import sys
+from time import monotonic, sleep
 
 import click
-import psutil
 
 from doma.configs import ControllerConfig, LaunchConfig
-from doma.core import PID_PATH, Signal, SocketData, daemonize
-from doma.gpu import GPUGroupManager
+from doma.core import PID_PATH, Signal, SocketData
 from doma.utils import (
+    _alive_and_not_zombie,
     cfg_as_opt,
     exchange_socket_data,
     get_logger,
     is_server_dead,
+    pid_alive,
+    probe_server_alive,
     show_flattened_config,
 )
 
@@ -35,7 +37,7 @@ def _status() -> bool:
     try:
         socket_data = exchange_socket_data(SocketData(signal=Signal.GREETING))
         if socket_data.error is not None:
-            raise socket_data.error
+            raise RuntimeError(f"{socket_data.error[0]}: {socket_data.error[1]}")
         return True, None
     except Exception as e:
         return False, e
@@ -64,42 +66,47 @@ def launch(config: LaunchConfig):
     parent_dir = config.cache_path
     os.makedirs(parent_dir, exist_ok=True)
     log_path = f"{config.cache_path}/doma.log"
-    if not is_server_dead(wait_time=1):
+    if probe_server_alive():
         logger.warning("Server is already running.")
         return
 
-    def _launch_manager():
-        import signal
-
-        def signal_handler(signum, frame):
-            """Handle shutdown signals gracefully"""
-            logger = get_logger()
-            logger.info(f"Received signal {signum}, shutting down...")
-            # The gpu_group_manager.listen_signal() loop will handle cleanup
-
-        # Set up signal handlers for graceful shutdown
-        signal.signal(signal.SIGTERM, signal_handler)
-        signal.signal(signal.SIGINT, signal_handler)
-
-        pid = os.getpid()
-        with open(PID_PATH, "w") as f:
-            f.write(str(pid))
-
-        gpu_group_manager = GPUGroupManager(ControllerConfig())
-        gpu_group_manager.listen_signal()
-        os.remove(PID_PATH)
-
-    daemonize(_launch_manager, stdout=log_path, stderr=log_path)
-
-    MAX_RETRY = 10
-    for _ in range(MAX_RETRY):
-        sleep(1)
+    # Spawn the server in a fresh interpreter (doma._daemon_entry) so it
+    # only loads what the daemon needs. posix_spawn skips fork's
+    # copy-on-write of the CLI's address space entirely; setsid detaches
+    # the daemon and the file actions wire stdio to the log file.
+    devnull_fd = os.open(os.devnull, os.O_RDONLY)
+    log_fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.posix_spawn(
+            sys.executable,
+            [sys.executable, "-m", "doma._daemon_entry"],
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_DUP2, devnull_fd, 0),
+                (os.POSIX_SPAWN_DUP2, log_fd, 1),
+                (os.POSIX_SPAWN_DUP2, log_fd, 2),
+            ],
+            setsid=True,
+        )
+    finally:
+        os.close(devnull_fd)
+        os.close(log_fd)
+
+    # Probe with exponential backoff so a fast server start is noticed in
+    # tens of milliseconds instead of after a fixed 1s sleep.
+    LAUNCH_TIMEOUT = 10
+    delay = 0.01
+    deadline = monotonic() + LAUNCH_TIMEOUT
+    while True:
+        sleep(delay)
         is_running, error = _status()
         if is_running:
             logger.success("Server launched.")
             break
-    else:
-        logger.error(f"Failed to launch server. {str(error)}")
+        if monotonic() >= deadline:
+            logger.error(f"Failed to launch server. {str(error)}")
+            break
+        delay = min(delay * 2, 1.0)
 
 
 @cli.command()
@@ -109,7 +116,7 @@ def start(config: ControllerConfig):
     Start to wait for GPUs being idle and hold them with the given config.
     """
     logger = get_logger()
-    if is_server_dead(wait_time=1):
+    if not pid_alive():
         logger.warning("Server is not running. Run `doma launch` to launch the server.")
         return
     try:
@@ -117,8 +124,7 @@ def start(config: ControllerConfig):
             SocketData(signal=Signal.START, config=config)
         )
         if socket_data.error is not None:
-            logger.exception(socket_data.error)
-            raise RuntimeError(socket_data.error)
+            raise RuntimeError(f"{socket_data.error[0]}: {socket_data.error[1]}")
         logger.success(
             f"Service started with config: \n{show_flattened_config(config)}"
         )
@@ -134,7 +140,7 @@ def restart(config: ControllerConfig):
     Release all GPUs and wait to hold them with the given config from the beginning. The behavior is the same as `start`.
     """
     logger = get_logger()
-    if is_server_dead(wait_time=1):
+    if not pid_alive():
         logger.warning("Server is not running. Run `doma launch` to launch the server.")
         return
     try:
@@ -142,7 +148,7 @@ def restart(config: ControllerConfig):
             SocketData(signal=Signal.RESTART, config=config)
         )
         if socket_data.error is not None:
-            raise RuntimeError(socket_data.error)
+            raise RuntimeError(f"{socket_data.error[0]}: {socket_data.error[1]}")
         logger.success(
             f"Service restarted with config: \n{show_flattened_config(config)}"
         )
@@ -157,13 +163,13 @@ def stop():
     Stop holding and release all GPUs.
     """
     logger = get_logger()
-    if is_server_dead(wait_time=1):
+    if not pid_alive():
         logger.warning("Server is not running. Run `doma launch` to launch the server.")
         return
     try:
         socket_data = exchange_socket_data(SocketData(signal=Signal.STOP))
         if socket_data.error is not None:
-            raise RuntimeError(socket_data.error)
+            raise RuntimeError(f"{socket_data.error[0]}: {socket_data.error[1]}")
         logger.success("Service stopped.")
     except Exception as e:
         logger.exception(e)
@@ -181,7 +187,7 @@ def shutdown():
         return
     with open(PID_PATH, "r") as f:
         pid = int(f.read())
-    if not psutil.pid_exists(pid):
+    if not _alive_and_not_zombie(pid):
         os.remove(PID_PATH)
         logger.warning("Server is not running.")
         return
@@ -189,7 +195,7 @@ def shutdown():
     try:
         socket_data = exchange_socket_data(SocketData(signal=Signal.SHUTDOWN))
         if socket_data.error is not None:
-            raise socket_data.error
+            raise RuntimeError(f"{socket_data.error[0]}: {socket_data.error[1]}")
     except Exception as e:
         logger.warning(
             f"Failed to shutdown server gracefully: {e}.\nTrying to shutdown forcefully..."
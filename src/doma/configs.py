@@ -1,4 +1,6 @@
-from typing import Any, Dict, Tuple, Type
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Tuple, Type
 
 from pydantic import BaseModel, Field
 from pydantic.fields import FieldInfo
@@ -61,29 +63,85 @@ class LaunchConfig(BaseModel):
     cache_path: str = Field(default="/tmp/doma", description="Path to cache directory")
 
 
-def get_config_field_recursively(
+def _is_config_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _collect_config_fields(
     config: Type[BaseModel], reverse: bool = False
-) -> Tuple[str, FieldInfo]:
+) -> Tuple[Tuple[str, FieldInfo], ...]:
+    # Iterative depth-first walk with an explicit stack of iterators, so
+    # deep config trees cost no Python frames per level. reverse applies
+    # to the top level only; nested models always flatten in declaration
+    # order.
+    fields = []
+    iterator = config.model_fields.items()
     if reverse:
-        iterator = reversed(config.model_fields.items())
-    else:
-        iterator = config.model_fields.items()
-    for name, field in iterator:
-        if issubclass(field.annotation, BaseModel):
-            yield from get_config_field_recursively(field.annotation)
+        iterator = reversed(iterator)
+    stack = [iter(iterator)]
+    while stack:
+        for name, field in stack[-1]:
+            if _is_config_model(field.annotation):
+                stack.append(iter(field.annotation.model_fields.items()))
+                break
+            fields.append((name, field))
         else:
-            yield name, field
+            stack.pop()
+    return tuple(fields)
+
+
+def get_config_field_recursively(
+    config: Type[BaseModel], reverse: bool = False
+) -> Iterator[Tuple[str, FieldInfo]]:
+    # The field tree of a config class never changes at runtime, so the
+    # traversal is computed once per class and cached.
+    yield from _collect_config_fields(config, reverse)
+
+
+@lru_cache(maxsize=None)
+def _flattened_routes(config_cls: Type[BaseModel]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Map each flattened leaf name to its path of nested field names,
+    computed once per model class.
+    """
+    routes: Dict[str, Tuple[str, ...]] = {}
+    stack = [(config_cls, ())]
+    while stack:
+        cls, path = stack.pop()
+        for name, field in cls.model_fields.items():
+            if _is_config_model(field.annotation):
+                stack.append((field.annotation, path + (name,)))
+            else:
+                # Interned keys let the route lookup hit on pointer
+                # equality when the caller interns its keys too.
+                routes[sys.intern(name)] = path
+    return routes
+
+
+def intern_keys(d: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Intern string keys once at the boundary (CLI parsing yields fresh
+    str objects per invocation) so route lookups compare by pointer.
+    """
+    return {sys.intern(k): v for k, v in d.items()}
 
 
 def build_config_from_flattened_dict(
     flattened_dict: Dict[str, Any], config_cls: Type[BaseModel]
 ) -> BaseModel:
-    config = config_cls.model_validate(flattened_dict)
-    for name, field in config_cls.model_fields.items():
-        if issubclass(field.annotation, BaseModel):
-            setattr(
-                config,
-                name,
-                build_config_from_flattened_dict(flattened_dict, field.annotation),
-            )
-    return config
+    # One pass over the flat dict routes every value into a nested dict
+    # of the right shape, then a single model_validate builds and
+    # validates the whole tree in pydantic-core, instead of validating
+    # once per nesting level and patching submodels in afterwards.
+    routes = _flattened_routes(config_cls)
+    nested: Dict[str, Any] = {}
+    for name, value in flattened_dict.items():
+        path = routes.get(name)
+        if path is None:
+            continue
+        target = nested
+        for part in path:
+            target = target.setdefault(part, {})
+        target[name] = value
+    return config_cls.model_validate(nested)
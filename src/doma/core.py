@@ -1,17 +1,21 @@
+import array
+import json
 import os
-import pickle
+import select
 import socket
+import struct
 import sys
+import weakref
 from contextlib import contextmanager
-from enum import Enum
-from typing import Callable, Optional
+from enum import IntEnum
+from typing import Callable, Optional, Tuple
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel
 
 from doma.configs import ControllerConfig
 
 
-class Signal(Enum):
+class Signal(IntEnum):
     START = 0
     STOP = 1
     RESTART = 2
@@ -20,10 +24,11 @@ class Signal(Enum):
 
 
 class SocketData(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
     signal: Signal
     config: Optional[ControllerConfig] = None
-    error: Optional[Exception] = None
+    # Errors travel as (type name, message) so they serialize without
+    # pickling Exception objects across the socket.
+    error: Optional[Tuple[str, str]] = None
 
 
 SOCKET_PATH = "/tmp/doma/doma.sock"
@@ -32,49 +37,306 @@ SOCKET_TIMEOUT = 5
 PID_PATH = "/tmp/doma/PID"
 
 
+# SOCK_SEQPACKET preserves message boundaries on AF_UNIX sockets (Linux),
+# so one recv returns exactly one message without any framing. Platforms
+# without it fall back to SOCK_STREAM plus the length-prefixed framing.
+MAX_MESSAGE_SIZE = 65536
+
+
 def get_socket():
     server_address = SOCKET_PATH
-    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    except (AttributeError, OSError):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Size the kernel buffers so any single control message fits without
+    # the sender or receiver blocking mid-message.
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, MAX_MESSAGE_SIZE)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, MAX_MESSAGE_SIZE)
+    s.settimeout(SOCKET_TIMEOUT)
     return s, server_address
 
 
+# Last timeout applied per socket, so repeated settimeout calls with an
+# unchanged value skip the setsockopt syscall. Keyed weakly: entries die
+# with their sockets.
+_TIMEOUT_CACHE = weakref.WeakKeyDictionary()
+_TIMEOUT_UNSET = object()
+
+
+def _settimeout_cached(conn: socket.socket, timeout: Optional[float]):
+    if _TIMEOUT_CACHE.get(conn, _TIMEOUT_UNSET) != timeout:
+        conn.settimeout(timeout)
+        try:
+            _TIMEOUT_CACHE[conn] = timeout
+        except TypeError:
+            pass  # conn is not weak-referenceable; just skip the cache
+
+
 @contextmanager
 def socket_timeout(conn: socket.socket, timeout: Optional[float] = None):
     if timeout:
-        conn.settimeout(timeout)
+        _settimeout_cached(conn, timeout)
     yield
     if timeout:
-        conn.settimeout(None)
+        _settimeout_cached(conn, None)
+
+
+# Length prefix for SOCK_STREAM framing: one unsigned 32-bit big-endian
+# integer, packed with a precompiled Struct.
+_HDR = struct.Struct("!I")
+HEADER_SIZE = _HDR.size
+
+# Precomputed signal byte tables, so the per-frame codec does two dict
+# indexes instead of enum attribute lookup and enum construction.
+_SIGNAL_ENC = {s: bytes([s.value]) for s in Signal}
+_SIGNAL_DEC = {s.value: s for s in Signal}
+
+
+def _encode_socket_data(data: SocketData) -> bytes:
+    """
+    Encode a SocketData as one signal byte, two presence flags, and an
+    optional JSON tail.
+    """
+    payload = _SIGNAL_ENC[data.signal] + bytes(
+        [data.config is not None, data.error is not None]
+    )
+    if data.config is not None or data.error is not None:
+        tail = {
+            "config": data.config.model_dump() if data.config is not None else None,
+            "error": data.error,
+        }
+        payload += json.dumps(tail).encode()
+    return payload
+
+
+def _decode_socket_data(payload: bytes) -> SocketData:
+    signal = _SIGNAL_DEC[payload[0]]
+    config = None
+    error = None
+    if payload[1] or payload[2]:
+        tail = json.loads(payload[3:])
+        if payload[1]:
+            config = ControllerConfig.model_validate(tail["config"])
+        if payload[2]:
+            error = tuple(tail["error"])
+    return SocketData(signal=signal, config=config, error=error)
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    offset = 0
+    while offset < size:
+        received = conn.recv_into(view[offset:])
+        if received == 0:
+            raise ConnectionError("Socket closed before the full message arrived.")
+        offset += received
+    return buffer
 
 
-EOS = b"END_OF_SOCKET_DATA"
+# Bytes that _recv_frame's one-shot recv pulled in past the end of a
+# frame. They belong to the next queued frame on that connection and are
+# consumed first by the next read; entries die with their sockets.
+_RECV_BUFFERS = weakref.WeakKeyDictionary()
+
+
+def _has_buffered(conn: socket.socket) -> bool:
+    return bool(_RECV_BUFFERS.get(conn))
+
+
+def _recv_frame(conn: socket.socket) -> bytes:
+    """
+    Read one length-prefixed frame. In the common case the first
+    recv_into captures header and body in a single syscall; only frames
+    that arrive fragmented keep reading, and only frames larger than the
+    preallocated buffer fall back to an exact-size read. Bytes received
+    past the end of the frame are carried over in _RECV_BUFFERS for the
+    next read instead of being dropped.
+    """
+    buffer = bytearray(MAX_MESSAGE_SIZE)
+    view = memoryview(buffer)
+    received = 0
+    carried = _RECV_BUFFERS.pop(conn, None)
+    if carried:
+        received = len(carried)
+        view[:received] = carried
+    while received < HEADER_SIZE:
+        got = conn.recv_into(view[received:])
+        if got == 0:
+            raise ConnectionError("Socket closed before the full message arrived.")
+        received += got
+    (length,) = _HDR.unpack_from(buffer)
+    total = HEADER_SIZE + length
+    if total > MAX_MESSAGE_SIZE:
+        rest = _recv_exact(conn, total - received)
+        return bytes(view[HEADER_SIZE:received]) + bytes(rest)
+    while received < total:
+        got = conn.recv_into(view[received:])
+        if got == 0:
+            raise ConnectionError("Socket closed before the full message arrived.")
+        received += got
+    if received > total:
+        _RECV_BUFFERS[conn] = bytes(view[total:received])
+    return bytes(view[HEADER_SIZE:total])
+
+
+def _wait_readable(conn: socket.socket, timeout: Optional[float]):
+    # Waiting in poll instead of blocking inside recv keeps the process
+    # responsive to signals (e.g. Ctrl-C in the CLI) while it waits.
+    if timeout is None:
+        timeout = conn.gettimeout()
+    poller = select.poll()
+    poller.register(conn, select.POLLIN)
+    events = poller.poll(None if timeout is None else timeout * 1000)
+    if not events:
+        raise TimeoutError("Timed out waiting for socket data.")
 
 
 def recv_socket_data(
     conn: socket.socket, timeout: Optional[float] = None
 ) -> SocketData:
-    with socket_timeout(conn, timeout):
-        bytes_buffer = b""
-        while True:
-            data = conn.recv(1024)
-            bytes_buffer += data
-            if EOS in bytes_buffer:
-                break
-        bytes_buffer = bytes_buffer.split(EOS)[0]
-        data = pickle.loads(bytes_buffer)
+    # The timeout is per-connection and constant, so it is set once here
+    # instead of toggled around every recv/send by socket_timeout.
+    if timeout is not None:
+        _settimeout_cached(conn, timeout)
+    if conn.type == socket.SOCK_SEQPACKET:
+        _wait_readable(conn, timeout)
+        payload = conn.recv(MAX_MESSAGE_SIZE)
+        if not payload:
+            raise ConnectionError("Socket closed before the full message arrived.")
+        data = _decode_socket_data(payload)
+    else:
+        # Carried-over bytes from an earlier over-read count as readable
+        # even when the kernel queue is empty.
+        if not _has_buffered(conn):
+            _wait_readable(conn, timeout)
+        data = _decode_socket_data(_recv_frame(conn))
     return data
 
 
+def recv_socket_data_batch(
+    conn: socket.socket, timeout: Optional[float] = None, max_messages: int = 64
+) -> Tuple[array.array, list, int]:
+    """
+    Drain up to max_messages already-queued messages from conn into
+    parallel arrays: a contiguous byte array of signal values and a list
+    whose slots hold (config, error) only for messages that carried one.
+    Signal-only heartbeats -- the common case -- never build a
+    SocketData at all. Blocks for the first message like
+    recv_socket_data; the rest are taken only if already readable.
+    Returns (signals, tails, count).
+    """
+    if timeout is not None:
+        _settimeout_cached(conn, timeout)
+    signals = array.array("B", bytes(max_messages))
+    tails: list = [None] * max_messages
+    count = 0
+    while count < max_messages:
+        if conn.type == socket.SOCK_SEQPACKET or not _has_buffered(conn):
+            try:
+                _wait_readable(conn, timeout if count == 0 else 0)
+            except TimeoutError:
+                if count == 0:
+                    raise
+                break
+        try:
+            if conn.type == socket.SOCK_SEQPACKET:
+                payload = conn.recv(MAX_MESSAGE_SIZE)
+                if not payload:
+                    raise ConnectionError(
+                        "Socket closed before the full message arrived."
+                    )
+            else:
+                payload = _recv_frame(conn)
+        except (ConnectionError, TimeoutError):
+            # A torn frame that never completes must not discard the
+            # messages already drained; hand those back and let the
+            # next call (or the connection teardown) deal with it.
+            if count == 0:
+                raise
+            break
+        signals[count] = payload[0]
+        if payload[1] or payload[2]:
+            data = _decode_socket_data(payload)
+            tails[count] = (data.config, data.error)
+        count += 1
+    return signals, tails, count
+
+
 def send_socket_data(
     conn: socket.socket, data: SocketData, timeout: Optional[float] = None
 ):
-    with socket_timeout(conn, timeout):
-        conn.send(pickle.dumps(data) + EOS)
+    if timeout is not None:
+        _settimeout_cached(conn, timeout)
+    payload = _encode_socket_data(data)
+    if conn.type == socket.SOCK_SEQPACKET:
+        conn.sendall(payload)
+    else:
+        # Scatter-gather write: header and body go out in one syscall
+        # without allocating a concatenated copy of the payload.
+        header = _HDR.pack(len(payload))
+        sent = conn.sendmsg([header, memoryview(payload)])
+        if sent < HEADER_SIZE + len(payload):
+            conn.sendall((header + payload)[sent:])
 
 
 def daemonize(
-    func: Callable, stdin="/dev/null", stdout="/dev/null", stderr="/dev/null"
+    func: Callable,
+    stdin="/dev/null",
+    stdout="/dev/null",
+    stderr="/dev/null",
+    use_posix_spawn=False,
+    clear_umask=False,
 ):
+    """
+    Run func as a detached daemon. The default double-fork path works
+    everywhere; use_posix_spawn=True starts a fresh interpreter via
+    posix_spawn instead, skipping the page-table copy fork forces on a
+    large parent (func must then be picklable). clear_umask=True
+    restores the old umask(0) behavior for daemons that create files and
+    expect no mode mask.
+    """
+    if use_posix_spawn:
+        _daemonize_spawn(func, stdin, stdout, stderr)
+    else:
+        _daemonize_fork(func, stdin, stdout, stderr, clear_umask)
+
+
+def _daemonize_spawn(func: Callable, stdin, stdout, stderr):
+    import pickle
+
+    # The pickled target travels through a pipe dup2'd to fd 3 in the
+    # child; POSIX_SPAWN_OPEN actions wire stdio and setsid detaches the
+    # daemon, all without a fork of this process.
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(write_fd, "wb") as f:
+        pickle.dump(func, f)
+    loader = (
+        "import os, pickle\n"
+        "with os.fdopen(3, 'rb') as f:\n"
+        "    func = pickle.load(f)\n"
+        "func()\n"
+    )
+    file_actions = [
+        (os.POSIX_SPAWN_OPEN, 0, stdin, os.O_RDONLY, 0),
+        (os.POSIX_SPAWN_OPEN, 1, stdout, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644),
+        (os.POSIX_SPAWN_OPEN, 2, stderr, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644),
+        (os.POSIX_SPAWN_DUP2, read_fd, 3),
+    ]
+    try:
+        os.posix_spawn(
+            sys.executable,
+            [sys.executable, "-c", loader],
+            os.environ,
+            file_actions=file_actions,
+            setsid=True,
+        )
+    finally:
+        os.close(read_fd)
+
+
+def _daemonize_fork(func: Callable, stdin, stdout, stderr, clear_umask=False):
     try:
         pid = os.fork()
         if pid > 0:
@@ -86,7 +348,10 @@ def daemonize(
         sys.exit(1)
 
     os.chdir("/")
-    os.umask(0)
+    if clear_umask:
+        # Opt-in: clearing the umask is process-global state; the stdio
+        # redirects below already pass explicit modes to os.open.
+        os.umask(0)
     os.setsid()
 
     try:
@@ -99,11 +364,28 @@ def daemonize(
 
     sys.stdout.flush()
     sys.stderr.flush()
-    si = open(stdin, "r")
-    so = open(stdout, "w")
-    se = open(stderr, "w")
-    os.dup2(si.fileno(), sys.stdin.fileno())
-    os.dup2(so.fileno(), sys.stdout.fileno())
-    os.dup2(se.fileno(), sys.stderr.fileno())
+    # Raw fds: the fd is all dup2 needs, so skip building (and later
+    # garbage-collecting) three buffered TextIOWrapper objects.
+    si_fd = os.open(stdin, os.O_RDONLY)
+    so_fd = os.open(stdout, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    se_fd = os.open(stderr, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(si_fd, sys.stdin.fileno())
+    os.dup2(so_fd, sys.stdout.fileno())
+    os.dup2(se_fd, sys.stderr.fileno())
+    os.close(si_fd)
+    os.close(so_fd)
+    os.close(se_fd)
+
+    # Drop every other inherited fd. close_range is one syscall for the
+    # whole range (Linux 5.9+); older kernels fall back to a bounded
+    # close loop.
+    try:
+        os.close_range(3, os.sysconf("SC_OPEN_MAX"))
+    except (AttributeError, ValueError, OSError):
+        for fd in range(3, 1024):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
 
     func()
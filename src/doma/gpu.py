@@ -1,74 +1,98 @@
 import gc
 import os
-import socket
+import selectors
 import threading
-from collections import deque
-from dataclasses import dataclass
-from multiprocessing import Event as get_process_event
-from multiprocessing import Process
-from multiprocessing.synchronize import Event as ProcessEvent
-from time import sleep, time
 from typing import Literal, Optional
 
+import numpy as np
+import pynvml
 import torch
 from loguru import logger
 
 from doma.configs import ControllerConfig
-from doma.core import Signal, SocketData, get_socket, recv_socket_data, send_socket_data
+from doma.core import (
+    SOCKET_TIMEOUT,
+    Signal,
+    SocketData,
+    get_socket,
+    recv_socket_data_batch,
+    send_socket_data,
+)
 
 
-def compute_storage_size(gb):
-    return int(gb * 1024 * 1024 * 1024 / 8)
+def compute_storage_size(gb, element_size=8):
+    return int(gb * 1024 * 1024 * 1024 / element_size)
 
 
-@dataclass
-class GPUSnapshot:
-    used_mem: float
-    free_mem: float
-    util: float
+# Number of kernels captured into the hold CUDA graph. One replay issues
+# the whole batch, amortizing dispatcher and launch overhead.
+GRAPH_KERNEL_BATCH = 8
 
 
-class GPUController(Process):
-    def __init__(self, id: int, config: ControllerConfig, stop_signal: ProcessEvent):
+class GPUController:
+    """
+    Drives one GPU from a thread inside the manager process. All
+    controllers share the process; per-device isolation comes from
+    binding the thread to its device and a private CUDA stream, which is
+    far cheaper than one process (and one CUDA context) per GPU.
+    """
+
+    def __init__(self, id: int, config: ControllerConfig, stop_signal: threading.Event):
         """
         Args:
             id: GPU id
             config: Config
         """
-        super().__init__(daemon=True)
         self.id = id
         self.config = config
         self.alg_config = config.alg_config
         self.device = torch.device(f"cuda:{self.id}")
         self.stop_signal = stop_signal
+        self._total_mem_gb = None
+        self._nvml_handle = None
+        self._thread = None
+        # Structure-of-arrays ring buffers: one float32 slot per metric
+        # per sample, reduced in C by numpy. The manager's inspector
+        # thread is the single writer and publishes a monotonically
+        # increasing head after each sample, so readers need no lock;
+        # they may observe a sample-stale view, which is fine for
+        # minute-scale hold-condition metrics.
+        self.history_maxlen = int(config.wait_minutes * 60)
+        self._used_mem_history = np.empty(self.history_maxlen, dtype=np.float32)
+        self._free_mem_history = np.empty(self.history_maxlen, dtype=np.float32)
+        self._util_history = np.empty(self.history_maxlen, dtype=np.float32)
+        self._history_head = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
 
     def run(self):
-        self.start_inspect()
         while not self.validate_hold_condition():
-            sleep(1)
-            if self.stop_signal.is_set():
+            # wait returns True as soon as the event is set, so shutdown
+            # does not have to ride out the remainder of a fixed sleep.
+            if self.stop_signal.wait(1.0):
                 break
         if not self.stop_signal.is_set():
             logger.info(f"Start holding GPU {self.id}")
-            self.hold()
-        self.stop_inspect()
-
-    def start_inspect(self):
-        self.gpu_snapshot_queue = deque(maxlen=int(self.config.wait_minutes * 60))
-        self.history_queue_lock = threading.Lock()
-        self.inspect_stop_signal = threading.Event()
-        self.inspect_executor = threading.Thread(
-            target=self._inspect_worker, daemon=True
-        )
-        self.inspect_executor.start()
-
-    def stop_inspect(self):
-        self.inspect_stop_signal.set()
-        self.inspect_executor.join()
-        self.inspect_executor = None
-        self.inspect_stop_signal = None
-        self.gpu_snapshot_queue = None
-        self.history_queue_lock = None
+            with torch.cuda.device(self.id):
+                with torch.cuda.stream(torch.cuda.Stream(device=self.device)):
+                    self.hold()
+
+    def record_snapshot(self, used_mem, free_mem, util):
+        idx = self._history_head % self.history_maxlen
+        self._used_mem_history[idx] = used_mem
+        self._free_mem_history[idx] = free_mem
+        self._util_history[idx] = util
+        # Publish the sample by bumping the head after the writes.
+        self._history_head += 1
 
     def hold(self):
         holder = None
@@ -78,111 +102,167 @@ class GPUController(Process):
         util = self.config.hold_util
         if gb is None:
             gb = self.get_mem_total() * 0.5
-        operator_size = int(compute_storage_size(self.alg_config.operator_gb) / 2)
-        operator = torch.ones([operator_size], dtype=torch.double, device=self.device)
-        max_sleep_time = self.alg_config.max_sleep_time
-        min_sleep_time = self.alg_config.min_sleep_time
-        mid_sleep_time = (max_sleep_time + min_sleep_time) / 2
-        tic = time()
-        inspect_interval = self.alg_config.inspect_interval
-        util_samples = []
-        util_samples_num = self.alg_config.util_samples_num
-        find_target_sleep_time = False
-        # adjust sleep time to keep the utilization at util using binary search
-        first = True
-
-        while not self.stop_signal.is_set():
-            result = torch.mul(operator, operator)
-            if first:
-                used_gb = self.get_mem_used()
-                holder_gb = gb - used_gb
-                if holder_gb < 0:
-                    raise ValueError(
-                        f"Target GB ({gb}) is less than used GB ({used_gb}). Please reduce the operator GB ({self.alg_config.operator_gb})."
-                    )
-                holder_size = compute_storage_size(holder_gb)
-                holder = torch.randn(
-                    [holder_size], dtype=torch.double, device=self.device
-                )  # noqa: F841
-                tic = time()
-                first = False
-                continue
-            toc = time()
-            if not find_target_sleep_time and toc - tic >= inspect_interval:
-                if len(util_samples) < util_samples_num:
-                    util_samples.append(self.get_util())
-                    sleep(mid_sleep_time)
-                    tic = time()
-                    continue
-                cur_util = sum(util_samples) / util_samples_num
-                util_samples.clear()
-                if abs(cur_util - util) <= self.alg_config.util_eps:
-                    find_target_sleep_time = True
-                    continue
-                if cur_util < util:
-                    max_sleep_time = mid_sleep_time
-                elif cur_util > util:
-                    min_sleep_time = mid_sleep_time
-                mid_sleep_time = (max_sleep_time + min_sleep_time) / 2
-                tic = time()
-            sleep(mid_sleep_time)
+        # BF16 instead of FP64: the workload is bandwidth-bound and the
+        # values are discarded, so halving the element size doubles the
+        # elements touched per byte and avoids the 1/32-rate FP64 path
+        # on consumer GPUs.
+        hold_dtype = torch.bfloat16
+        element_size = torch.finfo(hold_dtype).bits // 8
+        operator_size = compute_storage_size(self.alg_config.operator_gb, element_size)
+        operator = torch.ones([operator_size], dtype=hold_dtype, device=self.device)
+        # Capture a fixed batch of kernels into a CUDA graph once; each
+        # loop tick then replays the graph instead of paying dispatcher
+        # plus cudaLaunchKernel cost per kernel.
+        capture_stream = torch.cuda.Stream(device=self.device)
+        capture_stream.wait_stream(torch.cuda.current_stream(self.device))
+        # In-place squaring reads and writes only the operator buffer: no
+        # output allocation and a third less memory traffic than
+        # result = mul(operator, operator). The buffer is all ones, so
+        # the values stay at 1.0 and never drift.
+        with torch.cuda.stream(capture_stream):
+            operator.mul_(operator)
+        torch.cuda.current_stream(self.device).wait_stream(capture_stream)
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph, stream=capture_stream):
+            for _ in range(GRAPH_KERNEL_BATCH):
+                operator.mul_(operator)
+        # The graph warmup above already touched the device, so NVML sees
+        # the context and operator before the holder is sized.
+        graph.replay()
+        torch.cuda.synchronize(self.device)
+        used_gb = self.get_mem_used()
+        holder_gb = gb - used_gb
+        if holder_gb < 0:
+            raise ValueError(
+                f"Target GB ({gb}) is less than used GB ({used_gb}). Please reduce the operator GB ({self.alg_config.operator_gb})."
+            )
+        # The holder only reserves memory and its values are never read,
+        # so skip randn's FP64 curand kernel: allocate raw uint8 bytes
+        # and zero them once to force the pages resident.
+        holder_size = compute_storage_size(holder_gb, element_size=1)
+        holder = torch.empty(
+            [holder_size], dtype=torch.uint8, device=self.device
+        )  # noqa: F841
+        holder.zero_()
+
+        sleep_time = self._calibrate(graph, util)
+        # Steady state: one timed wait and one graph replay per tick,
+        # with no clock reads or calibration branches left on the path.
+        while not self.stop_signal.wait(sleep_time):
+            graph.replay()
 
         if holder is not None:
             del holder
         if operator is not None:
             del operator
-        if result is not None:
-            del result
+        del graph
         gc.collect()
+        # empty_cache is a synchronous device-wide operation that can
+        # block for tens of ms under the allocator lock. The server
+        # process outlives STOP, so the cache must still be returned to
+        # the driver -- just off this thread's shutdown path, so STOP
+        # replies without waiting on it.
+        threading.Thread(target=self._release_cached_memory, daemon=True).start()
+
+    def _release_cached_memory(self):
         with torch.device(f"cuda:{self.id}"):
             torch.cuda.empty_cache()
             torch.cuda.reset_peak_memory_stats()
 
-    def _inspect_worker(self):
-        while not self.inspect_stop_signal.is_set():
-            with self.history_queue_lock:
-                self.gpu_snapshot_queue.append(
-                    GPUSnapshot(
-                        used_mem=self.get_mem_used(),
-                        free_mem=self.get_mem_free(),
-                        util=self.get_util(),
-                    )
-                )
-            sleep(1)
+    def _calibrate(self, graph, util):
+        """
+        Binary-search the sleep between graph replays until the implied
+        duty cycle lands within util_eps of the target. Returns the
+        tuned sleep time for the steady-state loop.
+
+        GPU-busy time is measured with CUDA events around one graph
+        replay instead of NVML utilization: NVML averages over a
+        driver-defined window (~1s on many drivers), so reading it after
+        sub-second sleeps needed util_samples_num samples per search
+        step just to denoise. Event timing is exact, so each step needs
+        a single replay and the search converges in log2 steps.
+        """
+        max_sleep_time = self.alg_config.max_sleep_time
+        min_sleep_time = self.alg_config.min_sleep_time
+        mid_sleep_time = (max_sleep_time + min_sleep_time) / 2
+
+        start = torch.cuda.Event(enable_timing=True)
+        end = torch.cuda.Event(enable_timing=True)
+        while not self.stop_signal.is_set():
+            start.record()
+            graph.replay()
+            end.record()
+            end.synchronize()
+            busy = start.elapsed_time(end) / 1000
+            measured_util = busy / (busy + mid_sleep_time)
+            if abs(measured_util - util) <= self.alg_config.util_eps:
+                break
+            if measured_util < util:
+                max_sleep_time = mid_sleep_time
+            elif measured_util > util:
+                min_sleep_time = mid_sleep_time
+            mid_sleep_time = (max_sleep_time + min_sleep_time) / 2
+            if max_sleep_time - min_sleep_time < 1e-6:
+                # The target lies outside the configured sleep range;
+                # settle for the closest attainable duty cycle.
+                break
+        return mid_sleep_time
+
+    def _poll(self):
+        """
+        Take one NVML snapshot of memory and utilization. The handle is
+        created lazily on first poll rather than in __init__.
+        """
+        if self._nvml_handle is None:
+            pynvml.nvmlInit()
+            self._nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(self.id)
+        mem = pynvml.nvmlDeviceGetMemoryInfo(self._nvml_handle)
+        util = pynvml.nvmlDeviceGetUtilizationRates(self._nvml_handle)
+        if self._total_mem_gb is None:
+            self._total_mem_gb = mem.total / (1024**3)
+        return mem.used / (1024**3), (mem.total - mem.used) / (1024**3), util.gpu / 100
 
     def get_mem_used(self):
-        return torch.cuda.device_memory_used(self.device) / (1024**3)
+        return self._poll()[0]
 
     def get_mem_total(self):
-        return torch.cuda.get_device_properties(self.device).total_memory / (1024**3)
+        if self._total_mem_gb is None:
+            self._poll()
+        return self._total_mem_gb
 
     def get_mem_free(self):
-        return self.get_mem_total() - self.get_mem_used()
+        return self._poll()[1]
 
     def get_util(self):
-        return torch.cuda.utilization(device=self.device) / 100
+        return self._poll()[2]
+
+    def _history_series(self, name: Literal["used_mem", "free_mem", "util"]):
+        if name == "used_mem":
+            return self._used_mem_history
+        elif name == "free_mem":
+            return self._free_mem_history
+        elif name == "util":
+            return self._util_history
 
     def get_history_metric(
         self,
         name: Literal["used_mem", "free_mem", "util"],
         metric_type: Literal["avg", "max", "min"],
     ):
-        with self.history_queue_lock:
-            metrics = [getattr(snapshot, name) for snapshot in self.gpu_snapshot_queue]
-            if metric_type == "avg":
-                return sum(metrics) / len(metrics)
-            elif metric_type == "max":
-                return max(metrics)
-            elif metric_type == "min":
-                return min(metrics)
+        count = min(self._history_head, self.history_maxlen)
+        metrics = self._history_series(name)[:count]
+        if metric_type == "avg":
+            return float(metrics.mean())
+        elif metric_type == "max":
+            return float(metrics.max())
+        elif metric_type == "min":
+            return float(metrics.min())
 
     def is_history_full(self):
-        with self.history_queue_lock:
-            return len(self.gpu_snapshot_queue) == self.gpu_snapshot_queue.maxlen
+        return self._history_head >= self.history_maxlen
 
     def reset_history(self):
-        with self.history_queue_lock:
-            self.gpu_snapshot_queue.clear()
+        self._history_head = 0
 
     def validate_hold_condition(self):
         return (
@@ -196,7 +276,9 @@ class GPUGroupManager:
         self.config = config
         self.launch_socket()
         self.gpu_controllers: list[GPUController] = []
-        self.controller_stop_signal = get_process_event()
+        self.controller_stop_signal = threading.Event()
+        self._inspector_thread = None
+        self._inspector_stop_signal = threading.Event()
 
     def reset_controllers(self):
         self.stop_controllers()
@@ -216,25 +298,47 @@ class GPUGroupManager:
         self.socket.bind(self.server_address)
         self.socket.listen()
 
+    def _inspect_worker(self):
+        # One inspector for the whole group: a single 1Hz wakeup polls
+        # NVML for every device instead of one timer thread per GPU.
+        while not self._inspector_stop_signal.wait(1.0):
+            for controller in self.gpu_controllers:
+                controller.record_snapshot(*controller._poll())
+
+    def start_inspector(self):
+        if self._inspector_thread is not None and self._inspector_thread.is_alive():
+            return
+        self._inspector_stop_signal.clear()
+        self._inspector_thread = threading.Thread(
+            target=self._inspect_worker, daemon=True
+        )
+        self._inspector_thread.start()
+
+    def stop_inspector(self):
+        self._inspector_stop_signal.set()
+        if self._inspector_thread is not None:
+            self._inspector_thread.join()
+            self._inspector_thread = None
+
     def start_controllers(self):
         self.controller_stop_signal.clear()
+        self.start_inspector()
         for controller in self.gpu_controllers:
             controller.start()
 
     def stop_controllers(self):
         self.controller_stop_signal.set()
+        self.stop_inspector()
         for controller in self.gpu_controllers:
             logger.info(f"Stopping controller {controller.id}")
             if controller.is_alive():
                 controller.join(timeout=10)  # Add timeout to prevent hanging
                 if controller.is_alive():
+                    # Daemon threads cannot be terminated; they exit with
+                    # the process.
                     logger.warning(
-                        f"Controller {controller.id} did not stop gracefully, terminating..."
+                        f"Controller {controller.id} did not stop gracefully within the timeout."
                     )
-                    controller.terminate()
-                    controller.join(
-                        timeout=5
-                    )  # Give it a bit more time after terminate
 
     def update_config(self, config: Optional[ControllerConfig]):
         if config is not None:
@@ -249,39 +353,62 @@ class GPUGroupManager:
         return True
 
     def listen_signal(self):
+        # Event-driven accept: block in the selector until a client
+        # actually connects instead of waking from accept() every 10s.
+        # The socket-file check degrades to a once-a-minute timer.
+        selector = selectors.DefaultSelector()
+        selector.register(self.socket, selectors.EVENT_READ)
         run = True
         while run and self.test_address_alive():
-            self.socket.settimeout(10)
-            try:
-                conn, _ = self.socket.accept()
-            except socket.timeout:
+            if not selector.select(timeout=60):
                 continue
+            conn, _ = self.socket.accept()
+            # Accepted sockets come back blocking with no timeout
+            # regardless of the listener's, so set one explicitly: an
+            # idle client must not wedge the single-threaded server.
+            conn.settimeout(SOCKET_TIMEOUT)
             with conn:
-                socket_data = recv_socket_data(conn)
-                signal = socket_data.signal
-                config = socket_data.config
-                logger.info(f"Received signal: {signal}")
-                error = None
-                try:
-                    match signal:
-                        case Signal.START:
-                            self.update_config(config)
-                            self.reset_controllers()
-                            self.start_controllers()
-                        case Signal.STOP:
-                            self.stop_controllers()
-                        case Signal.RESTART:
-                            self.update_config(config)
-                            self.reset_controllers()
-                            self.start_controllers()
-                        case Signal.SHUTDOWN:
-                            self.stop_controllers()
-                            run = False
-                        case Signal.GREETING:
-                            pass
-                except Exception as e:
-                    error = e
-                send_socket_data(conn, SocketData(signal=Signal.GREETING, error=error))
+                # Serve the connection until the client hangs up (or goes
+                # idle past the socket timeout), so clients can pipeline
+                # several signals without a connect/close cycle per call.
+                # Queued signals come in as one batch: a byte array of
+                # signal values plus tails for the messages carrying a
+                # config or error.
+                while run:
+                    try:
+                        signals, tails, count = recv_socket_data_batch(conn)
+                    except (ConnectionError, TimeoutError):
+                        break
+                    for i in range(count):
+                        signal = Signal(signals[i])
+                        config = tails[i][0] if tails[i] is not None else None
+                        logger.info(f"Received signal: {signal}")
+                        error = None
+                        try:
+                            match signal:
+                                case Signal.START:
+                                    self.update_config(config)
+                                    self.reset_controllers()
+                                    self.start_controllers()
+                                case Signal.STOP:
+                                    self.stop_controllers()
+                                case Signal.RESTART:
+                                    self.update_config(config)
+                                    self.reset_controllers()
+                                    self.start_controllers()
+                                case Signal.SHUTDOWN:
+                                    self.stop_controllers()
+                                    run = False
+                                case Signal.GREETING:
+                                    pass
+                        except Exception as e:
+                            error = (type(e).__name__, str(e))
+                        send_socket_data(
+                            conn, SocketData(signal=Signal.GREETING, error=error)
+                        )
+                        if not run:
+                            break
+        selector.close()
         self.socket.close()
         self.stop_controllers()
         if os.path.exists(self.server_address):
@@ -1,14 +1,21 @@
+import errno
 import os
+import selectors
+import socket
+import threading
 import typing
-from functools import update_wrapper
+from functools import lru_cache, update_wrapper
 from time import sleep
 from typing import Callable, Type
 
 import click
-import psutil
 from pydantic import BaseModel
 
-from doma.configs import build_config_from_flattened_dict, get_config_field_recursively
+from doma.configs import (
+    build_config_from_flattened_dict,
+    get_config_field_recursively,
+    intern_keys,
+)
 from doma.core import (
     PID_PATH,
     SOCKET_TIMEOUT,
@@ -16,73 +23,230 @@ from doma.core import (
     get_socket,
     recv_socket_data,
     send_socket_data,
-    socket_timeout,
 )
 
 
+_local = threading.local()
+
+
+def _connect(sock: socket.socket, addr: str, timeout: float):
+    # Non-blocking connect: kick it off with connect_ex and wait for
+    # writability in one selector poll instead of blocking inside
+    # connect, so the wait costs a single epoll_wait and honors the
+    # timeout exactly.
+    sock.setblocking(False)
+    try:
+        rc = sock.connect_ex(addr)
+        if rc not in (0, errno.EINPROGRESS, errno.EAGAIN):
+            raise OSError(rc, os.strerror(rc))
+        if rc != 0:
+            selector = selectors.DefaultSelector()
+            selector.register(sock, selectors.EVENT_WRITE)
+            try:
+                if not selector.select(timeout):
+                    raise TimeoutError("Timed out connecting to the doma server.")
+            finally:
+                selector.close()
+            rc = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if rc != 0:
+                raise OSError(rc, os.strerror(rc))
+    finally:
+        sock.setblocking(True)
+
+
 def exchange_socket_data(
     data: SocketData, timeout: float = SOCKET_TIMEOUT
 ) -> SocketData:
-    socket, addr = get_socket()
-    try:
-        with socket_timeout(socket, timeout):
-            socket.connect(addr)
-        send_socket_data(socket, data, timeout)
-        result = recv_socket_data(socket, timeout)
-    except Exception as e:
-        raise e
-    finally:
-        socket.close()
-    return result
+    # One persistent Client per thread: repeated exchanges (status
+    # polling, the shutdown sequence) reuse the same connection instead
+    # of paying a connect/close pair per call.
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = Client(timeout)
+    client.timeout = timeout
+    return client.exchange(data)
 
 
-def show_flattened_config(config: BaseModel) -> str:
-    config_dict = config.model_dump()
-    flattened_dict = {}
+class Client:
+    """
+    Context manager that keeps one connection to the doma server open
+    across multiple exchanges, avoiding a connect/close cycle per call
+    when doma is driven programmatically.
+    """
 
-    def _flatten_dict(d):
-        for name, value in d.items():
-            if isinstance(value, dict):
-                _flatten_dict(value)
-            else:
-                flattened_dict[name] = value
+    def __init__(self, timeout: float = SOCKET_TIMEOUT):
+        self.timeout = timeout
+        self._socket = None
 
-    _flatten_dict(config_dict)
-    return "\n".join([f"{name}: {value}" for name, value in flattened_dict.items()])
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-def cfg_as_opt(config_cls: Type[BaseModel]):
-    def decorator(func: Callable):
-        def wrapper(**kwargs):
-            config = build_config_from_flattened_dict(kwargs, config_cls)
-            return func(config)
+    def exchange(self, data: SocketData, _retried: bool = False) -> SocketData:
+        if self._socket is None:
+            sock, addr = get_socket()
+            try:
+                _connect(sock, addr, self.timeout)
+            except OSError:
+                sock.close()
+                raise
+            self._socket = sock
+        try:
+            send_socket_data(self._socket, data, self.timeout)
+            return recv_socket_data(self._socket, self.timeout)
+        except ConnectionError:
+            # The server dropped an idle connection; reconnect once.
+            self.close()
+            if _retried:
+                raise
+            return self.exchange(data, _retried=True)
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
 
-        for name, field in get_config_field_recursively(config_cls, reverse=True):
-            name = name.replace("_", "-")
-            if isinstance(field.annotation, typing._Final):
-                raise ValueError(f"Union type is not supported: {field.annotation}")
 
-            if field.is_required():
-                wrapper = click.option(
+def dump_config(config: BaseModel) -> bytes:
+    """
+    Serialize a config straight through pydantic-core's JSON writer,
+    skipping the model_dump() dict plus json.dumps() double conversion.
+    """
+    return config.model_dump_json().encode()
+
+
+def show_flattened_config(config: BaseModel) -> str:
+    # Iterative depth-first walk with an explicit stack of iterators:
+    # same inline ordering as the old recursion, without per-level
+    # Python frames or recursion-depth limits.
+    lines = []
+    stack = [iter(config.model_dump().items())]
+    while stack:
+        for name, value in stack[-1]:
+            if isinstance(value, dict):
+                stack.append(iter(value.items()))
+                break
+            lines.append(f"{name}: {value}")
+        else:
+            stack.pop()
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def _build_options(config_cls: Type[BaseModel]) -> tuple:
+    # Option construction only depends on the config class, so the click
+    # decorators are built once per class and reused across commands.
+    options = []
+    for name, field in get_config_field_recursively(config_cls, reverse=True):
+        name = name.replace("_", "-")
+        if isinstance(field.annotation, typing._Final):
+            raise ValueError(f"Union type is not supported: {field.annotation}")
+
+        if field.is_required():
+            options.append(
+                click.option(
                     f"--{name}",
                     type=field.annotation,
                     help=field.description,
                     show_default=True,
-                )(wrapper)
-            else:
-                wrapper = click.option(
+                )
+            )
+        else:
+            options.append(
+                click.option(
                     f"--{name}",
                     type=field.annotation,
                     default=field.default,
                     help=field.description,
                     show_default=True,
-                )(wrapper)
+                )
+            )
+    return tuple(options)
+
+
+@lru_cache(maxsize=None)
+def _compile_wrapper(config_cls: Type[BaseModel]):
+    # The wrapper body is compiled to a code object once per config
+    # class; each decoration only execs it against a fresh namespace to
+    # bind its target, instead of building a new closure per decoration.
+    source = "def _wrap(**kwargs):\n    return _target(_build(_intern(kwargs), _cls))\n"
+    return compile(source, f"<cfg_as_opt:{config_cls.__name__}>", "exec")
+
+
+def cfg_as_opt(config_cls: Type[BaseModel]):
+    def decorator(func: Callable):
+        namespace = {
+            "_target": func,
+            "_build": build_config_from_flattened_dict,
+            "_intern": intern_keys,
+            "_cls": config_cls,
+        }
+        exec(_compile_wrapper(config_cls), namespace)
+        wrapper = namespace["_wrap"]
+        for option in _build_options(config_cls):
+            wrapper = option(wrapper)
         update_wrapper(wrapper, func)
         return wrapper
 
     return decorator
 
 
+def pid_alive() -> bool:
+    """
+    Answer "is the server process up?" from the PID file alone, without
+    a socket round-trip. Use probe_server_alive/_status when the caller
+    needs the server to actually be responding.
+    """
+    # Imported here so CLI commands that never check the PID file do not
+    # pay psutil's import cost at startup.
+    import psutil
+
+    try:
+        with open(PID_PATH, "r") as f:
+            pid = int(f.read())
+    except (FileNotFoundError, ValueError):
+        return False
+    return psutil.pid_exists(pid)
+
+
+def probe_server_alive(timeout: float = 0.05) -> bool:
+    """
+    Decide liveness with a single short connect to the server socket,
+    instead of sleeping through is_server_dead's 1s polling loop.
+    """
+    s, addr = get_socket()
+    try:
+        s.settimeout(timeout)
+        s.connect(addr)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+def _alive_and_not_zombie(pid: int) -> bool:
+    # os.kill(pid, 0) plus one /proc/{pid}/stat read answers both
+    # questions psutil was asked, without constructing a Process object
+    # and rescanning /proc on every 1Hz poll.
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except (FileNotFoundError, ProcessLookupError):
+        return False
+    # The state char follows the parenthesised comm field; "Z" means the
+    # process is a zombie we expect PID 1 to reap.
+    return stat.rsplit(")", 1)[1].split()[0] != "Z"
+
+
 def is_server_dead(wait_time=10, remove_pid_file_if_dead=False) -> bool:
     try:
         with open(PID_PATH, "r") as f:
@@ -92,11 +256,7 @@ def is_server_dead(wait_time=10, remove_pid_file_if_dead=False) -> bool:
     flag = False
     for _ in range(wait_time):
         sleep(1)
-        if not psutil.pid_exists(pid):
-            flag = True
-            break
-        elif psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
-            # We expect PID=1 process can kill zombie process.
+        if not _alive_and_not_zombie(pid):
             flag = True
             break
     if flag and remove_pid_file_if_dead:
@@ -107,11 +267,16 @@ def is_server_dead(wait_time=10, remove_pid_file_if_dead=False) -> bool:
     return flag
 
 
-def get_logger():
+@lru_cache(maxsize=1)
+def get_logger(enqueue: bool = False):
+    """
+    With enqueue=True writes go through loguru's background queue, so a
+    long-running server never blocks on a log flush.
+    """
     import sys
 
     from loguru import logger
 
     logger.remove()
-    logger.add(sys.stdout, format="{message}", level="INFO")
+    logger.add(sys.stdout, format="{message}", level="INFO", enqueue=enqueue)
     return logger
@@ -18,7 +18,7 @@ def test_cmd_executes_with_defaults_and_required(monkeypatch):
     @test_cli.command()
     @utils.cfg_as_opt(TestConfig)
     def handle(config: TestConfig):
-        click.echo(json.dumps(config.model_dump()))
+        click.echo(utils.dump_config(config))
 
     # Discover the registered command name (wrapper function name)
     assert len(test_cli.commands) == 1
@@ -42,7 +42,7 @@ def test_underscore_to_dash_option_and_overrides(monkeypatch):
     @test_cli.command()
     @utils.cfg_as_opt(TestConfig)
     def handle(config: TestConfig):
-        click.echo(json.dumps(config.model_dump()))
+        click.echo(utils.dump_config(config))
 
     cmd_name = next(iter(test_cli.commands))
 
@@ -71,7 +71,7 @@ def test_pydantic_validation_error_propagates(monkeypatch):
     @test_cli.command()
     @utils.cfg_as_opt(PositiveOnly)
     def handle(config: PositiveOnly):
-        click.echo(json.dumps(config.model_dump()))
+        click.echo(utils.dump_config(config))
 
     cmd_name = next(iter(test_cli.commands))
 
@@ -91,4 +91,4 @@ def test_cmd_executes_with_union_types(monkeypatch):
     with pytest.raises(ValueError, match="Union type is not supported"):
         @utils.cfg_as_opt(TestConfig)
         def handle(config: TestConfig):
-            click.echo(json.dumps(config.model_dump()))
+            click.echo(utils.dump_config(config))
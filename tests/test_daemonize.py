@@ -1,4 +1,3 @@
-import builtins
 import os
 import sys
 
@@ -19,14 +18,6 @@ class DummyStream:
         self.flushed = True
 
 
-class DummyFile:
-    def __init__(self, fd: int):
-        self._fd = fd
-
-    def fileno(self):
-        return self._fd
-
-
 def test_daemonize_success_redirects_and_runs(monkeypatch):
     calls = {"fork": 0, "chdir": 0, "umask": [], "setsid": 0, "open": [], "dup2": []}
 
@@ -45,15 +36,15 @@ def test_daemonize_success_redirects_and_runs(monkeypatch):
     def fake_umask(mask):
         calls["umask"].append(mask)
 
-    def fake_open(path, mode="r", *args, **kwargs):
-        calls["open"].append((path, mode, args, kwargs))
+    def fake_open(path, flags, mode=0o777):
+        calls["open"].append((path, flags))
         if path == "in":
-            return DummyFile(100)
+            return 100
         if path == "out":
-            return DummyFile(101)
+            return 101
         if path == "err":
-            return DummyFile(102)
-        return DummyFile(200)
+            return 102
+        return 200
 
     def fake_dup2(src, dest):
         calls["dup2"].append((src, dest))
@@ -64,9 +55,10 @@ def test_daemonize_success_redirects_and_runs(monkeypatch):
     monkeypatch.setattr(os, "chdir", fake_chdir, raising=True)
     monkeypatch.setattr(os, "umask", fake_umask, raising=True)
     monkeypatch.setattr(os, "dup2", fake_dup2, raising=True)
-
-    # Patch open
-    monkeypatch.setattr(builtins, "open", fake_open, raising=True)
+    monkeypatch.setattr(os, "open", fake_open, raising=True)
+    monkeypatch.setattr(os, "close", lambda fd: None, raising=True)
+    # Keep the inherited-fd sweep away from pytest's own descriptors
+    monkeypatch.setattr(os, "close_range", lambda low, high: None, raising=False)
 
     # Provide controllable stdio streams
     stdin = DummyStream(10)
@@ -88,12 +80,13 @@ def test_daemonize_success_redirects_and_runs(monkeypatch):
     assert calls["fork"] == 2
     assert calls["setsid"] == 1
     assert calls["chdir"] == 1
-    assert calls["umask"] == [0]
+    # umask is no longer cleared by default; os.open passes explicit modes
+    assert calls["umask"] == []
 
-    # open called for each stream with expected modes
-    assert ("in", "r", (), {}) in calls["open"]
-    assert ("out", "w", (), {}) in calls["open"]
-    assert ("err", "w", (), {}) in calls["open"]
+    # open called for each stream with expected flags
+    assert ("in", os.O_RDONLY) in calls["open"]
+    assert ("out", os.O_WRONLY | os.O_CREAT | os.O_TRUNC) in calls["open"]
+    assert ("err", os.O_WRONLY | os.O_CREAT | os.O_TRUNC) in calls["open"]
 
     # dup2 should map opened fds to stdio fds
     assert (100, 10) in calls["dup2"]  # stdin
@@ -106,6 +99,38 @@ def test_daemonize_success_redirects_and_runs(monkeypatch):
     assert ran["ok"] is True
 
 
+def test_daemonize_posix_spawn_path_skips_fork(monkeypatch):
+    spawned = {}
+
+    def fake_spawn(path, argv, env, *, file_actions=None, setsid=False):
+        spawned["path"] = path
+        spawned["argv"] = argv
+        spawned["file_actions"] = file_actions
+        spawned["setsid"] = setsid
+        return 4242
+
+    def boom_fork():
+        raise AssertionError("fork must not be called on the spawn path")
+
+    monkeypatch.setattr(os, "posix_spawn", fake_spawn, raising=True)
+    monkeypatch.setattr(os, "fork", boom_fork, raising=True)
+
+    # print is picklable, unlike a locally defined function
+    core.daemonize(print, stdin="in", stdout="out", stderr="err", use_posix_spawn=True)
+
+    assert spawned["path"] == sys.executable
+    assert spawned["argv"][:2] == [sys.executable, "-c"]
+    assert spawned["setsid"] is True
+
+    actions = spawned["file_actions"]
+    assert (os.POSIX_SPAWN_OPEN, 0, "in", os.O_RDONLY, 0) in actions
+    opens = {a[1]: a for a in actions if a[0] == os.POSIX_SPAWN_OPEN}
+    assert opens[1][2] == "out"
+    assert opens[2][2] == "err"
+    # The pickled target is handed to the child as fd 3
+    assert any(a[0] == os.POSIX_SPAWN_DUP2 and a[2] == 3 for a in actions)
+
+
 def test_daemonize_first_fork_failure_exits_and_writes_stderr(monkeypatch, capsys):
     def boom_fork():
         raise OSError(12, "fail")
@@ -152,6 +177,8 @@ def test_daemonize_redirects_stdout_stderr_to_real_files(monkeypatch, tmp_path):
     monkeypatch.setattr(os, "setsid", lambda: None, raising=True)
     monkeypatch.setattr(os, "chdir", lambda p: None, raising=True)
     monkeypatch.setattr(os, "umask", lambda m: None, raising=True)
+    # Keep the inherited-fd sweep away from pytest's own descriptors
+    monkeypatch.setattr(os, "close_range", lambda low, high: None, raising=False)
 
     # Provide stdout/stderr objects with real fds that won't interfere with pytest's
     pre_out = open(tmp_path / "pre_out.txt", "w")
@@ -2,7 +2,6 @@ import os
 import socket
 import threading
 import time
-import pickle
 import pytest
 
 import doma.core as core
@@ -16,7 +15,7 @@ def test_get_socket_returns_unix_socket_and_path(monkeypatch, tmp_path):
     s, addr = core.get_socket()
     try:
         assert s.family == socket.AF_UNIX
-        assert s.type == socket.SOCK_STREAM
+        assert s.type in (socket.SOCK_SEQPACKET, socket.SOCK_STREAM)
         assert addr == tmp_sock_path
     finally:
         s.close()
@@ -53,11 +52,13 @@ def test_recv_socket_data_handles_chunked_frames():
     s1, s2 = socket.socketpair()
     try:
         data = core.SocketData(signal=core.Signal.GREETING, config=None)
-        data_bytes = pickle.dumps(data)
-        # Send in two chunks, EOS only at the end
-        s1.sendall(data_bytes[:10])
+        data_bytes = core._encode_socket_data(data)
+        frame = len(data_bytes).to_bytes(core.HEADER_SIZE, "big") + data_bytes
+        # Send in two chunks (splitting the length header itself); the
+        # receiver must keep reading until the frame is complete
+        s1.sendall(frame[:2])
         time.sleep(0.01)
-        s1.sendall(data_bytes[10:] + core.EOS)
+        s1.sendall(frame[2:])
 
         received = core.recv_socket_data(s2, timeout=0.5)
         assert received.signal == core.Signal.GREETING
@@ -67,6 +68,50 @@ def test_recv_socket_data_handles_chunked_frames():
         s2.close()
 
 
+def test_recv_socket_data_preserves_queued_frames():
+    s1, s2 = socket.socketpair()
+    try:
+        # Two frames queued before the first read: the one-shot recv may
+        # pull in both, but the second must survive for the next call
+        core.send_socket_data(s1, core.SocketData(signal=core.Signal.GREETING), timeout=0.5)
+        core.send_socket_data(s1, core.SocketData(signal=core.Signal.STOP), timeout=0.5)
+
+        first = core.recv_socket_data(s2, timeout=0.5)
+        second = core.recv_socket_data(s2, timeout=0.5)
+        assert first.signal == core.Signal.GREETING
+        assert second.signal == core.Signal.STOP
+    finally:
+        s1.close()
+        s2.close()
+
+
+def test_recv_socket_data_batch_drains_queued_frames():
+    s1, s2 = socket.socketpair()
+    try:
+        core.send_socket_data(s1, core.SocketData(signal=core.Signal.GREETING), timeout=0.5)
+        core.send_socket_data(s1, core.SocketData(signal=core.Signal.STOP), timeout=0.5)
+        core.send_socket_data(
+            s1,
+            core.SocketData(signal=core.Signal.SHUTDOWN, error=("ValueError", "boom")),
+            timeout=0.5,
+        )
+
+        signals, tails, count = core.recv_socket_data_batch(s2, timeout=0.5)
+        assert count == 3
+        assert list(signals[:count]) == [
+            core.Signal.GREETING,
+            core.Signal.STOP,
+            core.Signal.SHUTDOWN,
+        ]
+        # Signal-only messages have no tail; the third carries its error
+        assert tails[0] is None
+        assert tails[1] is None
+        assert tails[2] == (None, ("ValueError", "boom"))
+    finally:
+        s1.close()
+        s2.close()
+
+
 def test_recv_socket_data_times_out_when_no_data():
     s1, s2 = socket.socketpair()
     try: